@@ -0,0 +1,53 @@
+import time
+import numpy as np
+import localization as loc
+from camera import CameraSource, FakeCapture
+
+# Synthetic-frame benchmark for the droplet localizer.
+# Renders the droplet at random sub-pixel positions inside the search zone and
+# compares the float centroid (mask and brightness-weighted moments) against the
+# old int-truncated centroid, then times each variant per frame.
+
+TRIALS = 300
+SEED   = 0
+
+def run(mode_name="track"):
+    fake = FakeCapture()
+    cam  = CameraSource(fake, initial_mode=mode_name)
+    rng  = np.random.default_rng(SEED)
+
+    frames, truths = [], []
+    for _ in range(TRIALS):
+        x = rng.uniform(loc.SEARCH_X_MIN + 10, loc.SEARCH_X_MAX - 10)
+        y = rng.uniform(loc.SEARCH_Y_MIN + 10, loc.SEARCH_Y_MAX - 10)
+        fake.droplet = (x, y)
+        _, frame = cam.read()
+        frames.append(frame)
+        truths.append(loc.coordinates_to_pixels(x, y, (cam.width, cam.height)))
+    truths = np.array(truths)
+
+    results = {}
+    for label, weighted, truncate in (("int (old)", False, True),
+                                      ("mask moments", False, False),
+                                      ("weighted moments", True, False)):
+        est, conf = [], []
+        t0 = time.perf_counter()
+        for frame in frames:
+            det, _ = loc.locate_droplet(frame.copy(), weighted=weighted)
+            est.append(det.centroid if det is not None else (np.nan, np.nan))
+            conf.append(det.confidence if det is not None else 0.0)
+        elapsed = time.perf_counter() - t0
+        est = np.array(est)
+        if truncate:
+            est = np.trunc(est)
+        err = np.hypot(*(est - truths).T)
+        results[label] = (np.nanmean(err), np.nanmax(err), np.mean(conf), elapsed / TRIALS * 1000)
+
+    print(f"\n=== {mode_name}: {cam.width}x{cam.height}, {TRIALS} frames ===")
+    print(f"{'method':<18}{'mean err px':>12}{'max err px':>12}{'mean conf':>11}{'ms/frame':>10}")
+    for label, (mean_err, max_err, mean_conf, ms) in results.items():
+        print(f"{label:<18}{mean_err:>12.3f}{max_err:>12.3f}{mean_conf:>11.2f}{ms:>10.2f}")
+
+if __name__ == "__main__":
+    run("track")
+    run("settle")
@@ -0,0 +1,49 @@
+import os
+import time
+from simple_pid import PID
+from camera import FakeCapture
+from platform_controller import PlatformController, run_platforms
+
+# Throughput benchmark for driving several platforms from one process.
+# Each simulated platform has its own FakeCapture, localizer settings and PID
+# pair (main.py's 2-DOF gains) with no servos attached, and follows TRAJECTORY
+# through run_platforms(). Aggregate frames/s is compared between a single
+# worker thread and one thread per platform.
+#
+# For equal work per platform, the FakeCapture is handed over bare (no
+# set_mode(), so it stays at 720x480), every droplet sits at the same spot,
+# settling is unreachable and time is counted in frames at a simulated FPS,
+# so every waypoint times out after the same number of frames.
+
+FPS               = 30
+TRAJECTORY        = [(0, 0), (20, 0), (20, 20), (0, 20)]
+SECONDS_PER_POINT = 50 / FPS
+PLATFORMS         = (1, 2, 4, 8)
+
+def make_platform(i):
+    fake = FakeCapture(droplet=(-20.0, 10.0))
+    pid_x = PID(0.0005, 0.0007, 0.0, setpoint=0, output_limits=(-0.17, 0.17))
+    pid_y = PID(0.0018, 0.0007, 0.0, setpoint=0, output_limits=(-0.17, 0.17))
+    platform = PlatformController(fake, pid_x, pid_y, 17, 18, name=f"sim{i}",
+                                  settle_frames=float("inf"),
+                                  clock=lambda: platform.frames / FPS)
+    return platform
+
+def bench(n, workers):
+    platforms = [make_platform(i) for i in range(n)]
+    t0 = time.perf_counter()
+    run_platforms(platforms, [TRAJECTORY] * n, max_workers=workers,
+                  max_time_per_point=SECONDS_PER_POINT)
+    elapsed = time.perf_counter() - t0
+    return sum(p.frames for p in platforms) / elapsed
+
+if __name__ == "__main__":
+    bench(1, 1)   # warm up OpenCV before timing anything
+    probe = make_platform(0)
+    probe.follow(TRAJECTORY, SECONDS_PER_POINT)
+    print(f"{os.cpu_count()} CPU(s), {probe.frames} frames per platform")
+    print(f"{'platforms':>9}{'serial fps':>12}{'pooled fps':>12}{'speedup':>9}")
+    for n in PLATFORMS:
+        serial = bench(n, 1)
+        pooled = bench(n, n)
+        print(f"{n:>9}{serial:>12.0f}{pooled:>12.0f}{pooled / serial:>8.2f}x")
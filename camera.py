@@ -0,0 +1,147 @@
+import cv2
+import numpy as np
+
+# ── Capture modes ─────────────────────────────────────────────────────────────
+# "track" is the nominal mode the rest of the code was tuned against (720x480).
+# "settle" trades resolution for frame rate so the PID loop runs faster while
+# the droplet is already close to its waypoint. The camera may not support a
+# requested mode exactly; whatever it actually delivers is read back, and
+# consumers take the frame size from the frames themselves.
+
+class CaptureMode:
+    def __init__(self, width, height, fps, fourcc="MJPG"):
+        self.width  = width
+        self.height = height
+        self.fps    = fps
+        self.fourcc = fourcc
+
+    def __repr__(self):
+        return f"CaptureMode({self.width}x{self.height} @ {self.fps} fps, {self.fourcc})"
+
+CAPTURE_MODES = {
+    "track":  CaptureMode(720, 480, 30, "MJPG"),
+    "settle": CaptureMode(360, 240, 60, "MJPG"),
+}
+
+def _decode_fourcc(value):
+    value = int(value)
+    return "".join(chr((value >> (8 * i)) & 0xFF) for i in range(4))
+
+# ─────────────────────────────────────────────
+# Camera source
+# ─────────────────────────────────────────────
+
+class CameraSource:
+    """Wraps a cv2.VideoCapture-like device and negotiates capture modes.
+
+    Any object exposing read(), set(), get() and release() works, which is what
+    lets FakeCapture stand in for the real camera.
+    """
+
+    def __init__(self, device=0, modes=None, initial_mode="track"):
+        self.cap   = cv2.VideoCapture(device) if isinstance(device, (int, str)) else device
+        self.modes = dict(CAPTURE_MODES if modes is None else modes)
+        self.mode_name = None
+        self.width = self.height = self.fps = None
+        self.fourcc = None
+        self.set_mode(initial_mode)
+
+    def set_mode(self, name):
+        """Switch to a named capture mode; a no-op if it is already active."""
+        if name == self.mode_name:
+            return
+        mode = self.modes[name]
+
+        # FOURCC first: many UVC cameras only offer high FPS in MJPEG.
+        self.cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*mode.fourcc))
+        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, mode.width)
+        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, mode.height)
+        self.cap.set(cv2.CAP_PROP_FPS, mode.fps)
+
+        # Read back what the driver actually agreed to
+        self.width  = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH)) or mode.width
+        self.height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT)) or mode.height
+        self.fps    = self.cap.get(cv2.CAP_PROP_FPS) or mode.fps
+        self.fourcc = _decode_fourcc(self.cap.get(cv2.CAP_PROP_FOURCC))
+        self.mode_name = name
+
+    def read(self):
+        ret, frame = self.cap.read()
+        if ret:
+            # The frame itself is the ground truth for the size
+            h, w = frame.shape[:2]
+            self.width, self.height = w, h
+        return ret, frame
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def release(self):
+        self.cap.release()
+
+# ─────────────────────────────────────────────
+# Fake capture device (no camera required)
+# ─────────────────────────────────────────────
+
+_SUBPIXEL_BITS = 4
+
+class FakeCapture:
+    """Minimal cv2.VideoCapture stand-in that renders a red droplet.
+
+    Only the resolutions in `supported` are accepted; any other request snaps
+    to the closest one, the same way a real driver negotiates. The droplet
+    position is given in normalized (-100..100) coordinates via `droplet`.
+    """
+
+    def __init__(self, supported=((720, 480), (360, 240), (640, 480)),
+                 droplet=(0.0, 0.0), radius_units=4.0, max_fps=60):
+        self.supported    = list(supported)
+        self.droplet      = droplet
+        self.radius_units = radius_units
+        self.max_fps      = max_fps
+        self.props = {
+            cv2.CAP_PROP_FRAME_WIDTH:  self.supported[0][0],
+            cv2.CAP_PROP_FRAME_HEIGHT: self.supported[0][1],
+            cv2.CAP_PROP_FPS:          30.0,
+            cv2.CAP_PROP_FOURCC:       float(cv2.VideoWriter_fourcc(*"YUYV")),
+        }
+        self.opened = True
+
+    def set(self, prop, value):
+        if prop in (cv2.CAP_PROP_FRAME_WIDTH, cv2.CAP_PROP_FRAME_HEIGHT):
+            want_w = value if prop == cv2.CAP_PROP_FRAME_WIDTH else self.props[cv2.CAP_PROP_FRAME_WIDTH]
+            want_h = value if prop == cv2.CAP_PROP_FRAME_HEIGHT else self.props[cv2.CAP_PROP_FRAME_HEIGHT]
+            w, h = min(self.supported, key=lambda s: abs(s[0] - want_w) + abs(s[1] - want_h))
+            self.props[cv2.CAP_PROP_FRAME_WIDTH]  = w
+            self.props[cv2.CAP_PROP_FRAME_HEIGHT] = h
+        elif prop == cv2.CAP_PROP_FPS:
+            self.props[prop] = float(min(value, self.max_fps))
+        elif prop == cv2.CAP_PROP_FOURCC:
+            self.props[prop] = float(value)
+        else:
+            return False
+        return True
+
+    def get(self, prop):
+        return self.props.get(prop, 0.0)
+
+    def read(self):
+        if not self.opened:
+            return False, None
+        w = int(self.props[cv2.CAP_PROP_FRAME_WIDTH])
+        h = int(self.props[cv2.CAP_PROP_FRAME_HEIGHT])
+        frame = np.zeros((h, w, 3), dtype=np.uint8)
+        cx = (self.droplet[0] + 100) / 200 * w
+        cy = (100 - self.droplet[1]) / 200 * h
+        r  = max(2.0, self.radius_units / 200 * w)
+        # Fixed-point drawing so the droplet lands at sub-pixel positions
+        s = 1 << _SUBPIXEL_BITS
+        cv2.circle(frame, (int(round(cx * s)), int(round(cy * s))), int(round(r * s)),
+                   (0, 0, 255), -1, cv2.LINE_AA, _SUBPIXEL_BITS)
+        return True, frame
+
+    def isOpened(self):
+        return self.opened
+
+    def release(self):
+        self.opened = False
@@ -5,45 +5,100 @@ import numpy as np
 SEARCH_X_MIN, SEARCH_X_MAX = -53, 43
 SEARCH_Y_MIN, SEARCH_Y_MAX = -65, 75
 
+# ── Frame geometry ────────────────────────────────────────────────────────────
+# Gains and tolerances in main.py are tuned in REFERENCE pixels (720x480).
+# The transforms below take the (w, h) of the frame the pixels belong to and
+# fall back to the reference size when it is omitted.
+REFERENCE_WIDTH, REFERENCE_HEIGHT = 720, 480
+REFERENCE_SIZE = (REFERENCE_WIDTH, REFERENCE_HEIGHT)
+
 def draw_grid(image):
     """Draws the full -100 to 100 grid with the search zone highlighted."""
     h, w = image.shape[:2]
+    size = (w, h)
     font = cv2.FONT_HERSHEY_SIMPLEX
     col_minor, col_major, col_axis = (40, 40, 40), (70, 70, 70), (100, 100, 100)
 
     for v in range(-100, 101, 10):
         # Vertical lines
-        px, _ = coordinates_to_pixels(v, 0)
+        px, _ = coordinates_to_pixels(v, 0, size)
         px = int(px)
         color = col_axis if v == 0 else (col_major if v % 50 == 0 else col_minor)
         cv2.line(image, (px, 0), (px, h), color, 1)
 
         # Horizontal lines
-        _, py = coordinates_to_pixels(0, v)
+        _, py = coordinates_to_pixels(0, v, size)
         py = int(py)
         color = col_axis if v == 0 else (col_major if v % 50 == 0 else col_minor)
         cv2.line(image, (0, py), (w, py), color, 1)
     
     # Visual cue: Draw the "Active Search Zone" box in a subtle red/orange
-    x1, y1 = coordinates_to_pixels(SEARCH_X_MIN, SEARCH_Y_MAX)
-    x2, y2 = coordinates_to_pixels(SEARCH_X_MAX, SEARCH_Y_MIN)
+    x1, y1 = coordinates_to_pixels(SEARCH_X_MIN, SEARCH_Y_MAX, size)
+    x2, y2 = coordinates_to_pixels(SEARCH_X_MAX, SEARCH_Y_MIN, size)
     cv2.rectangle(image, (int(x1), int(y1)), (int(x2), int(y2)), (0, 0, 200), 1, cv2.LINE_AA)
     cv2.putText(image, "SEARCH ZONE (RED ONLY)", (int(x1)+5, int(y1)-8), font, 0.35, (0, 0, 200), 1)
     
     return image
 
-def find_centroid(image):
-    # 1. Draw Grid
-    image = draw_grid(image)
+# ── Detection quality ─────────────────────────────────────────────────────────
+# Areas are in 720x480 reference pixels. The rig's droplet is ~10 px across
+# (see annotated_frame.jpg), so EXPECTED_DROPLET_AREA is a full-size score;
+# blobs under MIN_BLOB_AREA are noise. The controller ignores detections whose
+# confidence falls below MIN_CONFIDENCE.
+MIN_BLOB_AREA = 15
+EXPECTED_DROPLET_AREA = 60
+MIN_CONFIDENCE = 0.3
+
+class Detection:
+    """Sub-pixel droplet detection in current-frame pixels."""
+
+    def __init__(self, cx, cy, area, confidence):
+        self.cx         = cx
+        self.cy         = cy
+        self.area       = area
+        self.confidence = confidence
+
+    @property
+    def centroid(self):
+        return (self.cx, self.cy)
+
+    def __repr__(self):
+        return f"Detection(({self.cx:.2f}, {self.cy:.2f}), area={self.area:.0f}, conf={self.confidence:.2f})"
+
+def _confidence(contour, area, total_area, frame_size):
+    """0..1 score from blob size, roundness and how much it dominates the mask."""
+    w, h = frame_size
+    scale = (w * h) / (REFERENCE_WIDTH * REFERENCE_HEIGHT)
+    min_area = MIN_BLOB_AREA * scale
+    full_area = EXPECTED_DROPLET_AREA * scale
+    if area < min_area:
+        return 0.0
+    perimeter = cv2.arcLength(contour, True)
+    poly_area = cv2.contourArea(contour)
+    circularity = min(1.0, 4 * np.pi * poly_area / (perimeter * perimeter)) if perimeter > 0 else 0.0
+    size = min(1.0, area / full_area)
+    dominance = area / total_area if total_area > 0 else 0.0
+    return circularity * size * dominance
+
+def locate_droplet(image, weighted=False, annotate=True):
+    """Find the red droplet and return (Detection or None, annotated image).
+
+    The centroid comes from the moments of the filled blob mask, or, with
+    weighted=True, from brightness-weighted moments over that mask, so it is
+    not quantized to whole pixels. All geometry follows the image's own size.
+    annotate=False skips drawing onto the image.
+    """
     h, w = image.shape[:2]
+    size = (w, h)
 
-    # 2. ROI Mask (Restrict search to +-50, +-75)
+    # 1. ROI Mask (Restrict search to +-50, +-75)
     mask_roi = np.zeros((h, w), dtype=np.uint8)
-    x1, y1 = coordinates_to_pixels(SEARCH_X_MIN, SEARCH_Y_MAX)
-    x2, y2 = coordinates_to_pixels(SEARCH_X_MAX, SEARCH_Y_MIN)
+    x1, y1 = coordinates_to_pixels(SEARCH_X_MIN, SEARCH_Y_MAX, size)
+    x2, y2 = coordinates_to_pixels(SEARCH_X_MAX, SEARCH_Y_MIN, size)
     cv2.rectangle(mask_roi, (int(x1), int(y1)), (int(x2), int(y2)), 255, -1)
 
-    # 3. Process HSV for RED
+    # 2. Process HSV for RED (before any overlay is drawn onto the frame, so
+    #    grid lines can't cut the droplet into pieces)
     hsv = cv2.cvtColor(image, cv2.COLOR_BGR2HSV)
 
     # Red Range 1 (0-10 degrees)
@@ -60,40 +115,81 @@ def find_centroid(image):
     # Combine with ROI Mask
     final_mask = cv2.bitwise_and(color_mask, mask_roi)
 
-    # 4. Cleanup and Centroid Detection
-    kernel = np.ones((5, 5), np.uint8)
+    # 3. Draw Grid
+    if annotate:
+        image = draw_grid(image)
+
+    # 4. Cleanup and Centroid Detection (5x5 at 720x480, scaled with the frame
+    #    so a low-resolution mode doesn't erase a small droplet)
+    k = max(3, int(round(5 * w / REFERENCE_WIDTH)) | 1)   # odd, so the open is centred
+    kernel = np.ones((k, k), np.uint8)
     final_mask = cv2.morphologyEx(final_mask, cv2.MORPH_OPEN, kernel)
     contours, _ = cv2.findContours(final_mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
 
     if not contours:
         return None, image
 
-    largest_contour = max(contours, key=cv2.contourArea)
-    M = cv2.moments(largest_contour)
+    areas = [cv2.contourArea(c) for c in contours]
+    best = int(np.argmax(areas))
+    largest_contour = contours[best]
+
+    # Moments over the blob's bounding box only
+    bx, by, bw, bh = cv2.boundingRect(largest_contour)
+    blob = np.zeros((bh, bw), dtype=np.uint8)
+    cv2.drawContours(blob, [largest_contour], -1, 255, -1, offset=(-bx, -by))
+    blob = cv2.bitwise_and(blob, final_mask[by:by + bh, bx:bx + bw])
+    area = float(cv2.countNonZero(blob))
+    if weighted:
+        val = hsv[by:by + bh, bx:bx + bw, 2]
+        M = cv2.moments(cv2.bitwise_and(val, blob))
+    else:
+        M = cv2.moments(blob, binaryImage=True)
     if M["m00"] == 0: return None, image
 
-    cx, cy = int(M["m10"] / M["m00"]), int(M["m01"] / M["m00"])
-    norm_x, norm_y = pixels_to_coordinates(cx, cy)
+    cx = bx + M["m10"] / M["m00"]
+    cy = by + M["m01"] / M["m00"]
+    confidence = _confidence(largest_contour, area, float(cv2.countNonZero(final_mask)), size)
+    detection = Detection(cx, cy, area, confidence)
+    if not annotate:
+        return detection, image
+    norm_x, norm_y = pixels_to_coordinates(cx, cy, size)
 
     # Feedback Visualization (Now in RED)
+    px, py = int(round(cx)), int(round(cy))
     cv2.drawContours(image, [largest_contour], -1, (0, 0, 255), 2)
-    cv2.circle(image, (cx, cy), 5, (0, 0, 255), -1)
-    cv2.putText(image, f"({norm_x:+.1f}, {norm_y:+.1f})", (cx+10, cy-10), 
+    cv2.circle(image, (px, py), 5, (0, 0, 255), -1)
+    cv2.putText(image, f"({norm_x:+.1f}, {norm_y:+.1f}) {confidence:.2f}", (px+10, py-10), 
                 cv2.FONT_HERSHEY_SIMPLEX, 0.45, (50, 50, 255), 1)
 
-    return (cx, cy), image
+    return detection, image
+
+def find_centroid(image):
+    """Float (cx, cy) of the droplet, or None, plus the annotated image."""
+    detection, image = locate_droplet(image)
+    if detection is None:
+        return None, image
+    return detection.centroid, image
 
 # ── Keep standard coordinate transforms ───────────────────────────────────────
 
 def find_error(x_desired, y_desired, centroid):
     return centroid[0] - x_desired, centroid[1] - y_desired
 
-def pixels_to_coordinates(x_pixels, y_pixels):
-    x = ((x_pixels - 360) / 360) * 100
-    y = ((240 - y_pixels) / 240) * 100 # Adjusted for typical cartesian up = positive
+def pixels_to_coordinates(x_pixels, y_pixels, frame_size=None):
+    w, h = frame_size or REFERENCE_SIZE
+    half_w, half_h = w / 2, h / 2
+    x = ((x_pixels - half_w) / half_w) * 100
+    y = ((half_h - y_pixels) / half_h) * 100 # Adjusted for typical cartesian up = positive
     return (x, y)
 
-def coordinates_to_pixels(x_coordinate, y_coordinate):
-    x_pixel = ((x_coordinate + 100) / 200) * 720
-    y_pixel = ((100 - y_coordinate) / 200) * 480
+def coordinates_to_pixels(x_coordinate, y_coordinate, frame_size=None):
+    w, h = frame_size or REFERENCE_SIZE
+    x_pixel = ((x_coordinate + 100) / 200) * w
+    y_pixel = ((100 - y_coordinate) / 200) * h
     return (x_pixel, y_pixel)
+
+def to_reference_pixels(x_pixels, y_pixels, frame_size=None):
+    """Rescale a pixel position in a frame_size frame to 720x480 reference pixels."""
+    w, h = frame_size or REFERENCE_SIZE
+    return (x_pixels * REFERENCE_WIDTH / w,
+            y_pixels * REFERENCE_HEIGHT / h)
@@ -1,10 +1,12 @@
-import time
 import math
 import cv2
 import numpy as np
 import matplotlib.pyplot as plt
 from simple_pid import PID
 import localization as loc
+from camera import CameraSource
+from recording import FrameRecorder, ReplaySource
+from platform_controller import PlatformController, servo_pulse_width
 import pigpio
 
 # Initialize pigpio
@@ -39,9 +41,7 @@ def pixels_to_mm(dx_px, dy_px):
     return math.sqrt(dx_mm ** 2 + dy_mm ** 2)
 
 def set_servo_position(gpio_pin, position, min_pulse=500, max_pulse=2500):
-    position = max(-1.0, min(1.0, position))
-    pulse_width = min_pulse + (position + 1) * (max_pulse - min_pulse) / 2
-    pi.set_servo_pulsewidth(gpio_pin, pulse_width)
+    pi.set_servo_pulsewidth(gpio_pin, servo_pulse_width(position, min_pulse, max_pulse))
 
 # PID Constants:
 #Top Servo 7 DOF
@@ -58,10 +58,6 @@ kxP, kxI, kxD = 0.0005, 0.0007, 0.00000
 pid_x = PID(kxP, kxI, kxD, setpoint=0, output_limits=(-0.17, 0.17))
 pid_y = PID(kyP, kyI, kyD, setpoint=0, output_limits=(-0.17, 0.17))
 
-def adjust_servo(x, y):
-    set_servo_position(x_servo_pin,-1* pid_x(x))
-    set_servo_position(y_servo_pin,-1 * pid_y(y))
-
 # ─────────────────────────────────────────────
 # Trajectory generators
 # ─────────────────────────────────────────────
@@ -180,94 +176,116 @@ def show_velocity_graph(timestamps, velocities):
 # Trajectory follower with LIVE FEED
 # ─────────────────────────────────────────────
 
-def follow_trajectory(cap, trajectory, tolerance=25, max_time_per_point=30):
+def follow_trajectory(cap, trajectory, tolerance=25, max_time_per_point=30,
+                      settle_radius=60, settle_frames=5, min_confidence=loc.MIN_CONFIDENCE,
+                      recorder=None, clock=None, drive_servos=True):
+    """Drive the droplet through each waypoint.
+
+    Errors, tolerance and settle_radius are in 720x480 reference pixels, so the
+    loop behaves the same whatever resolution the camera is delivering. When
+    `cap` supports set_mode() (camera.CameraSource), it drops into the faster
+    "settle" mode once inside settle_radius and returns to "track" outside
+    twice that radius, or after a few frames without a detection.
+
+    Detections below min_confidence neither move the servos nor count toward
+    the settle_frames consecutive in-tolerance frames needed to advance.
+
+    With a recording.FrameRecorder, every raw frame is saved along with its
+    timestamp and the servo command it produced. To replay, pass a
+    recording.ReplaySource as `cap` and its clock() as `clock`: the loop then
+    runs on the recorded timestamps instead of the wall clock. The PIDs and
+    the max_time_per_point timeout always go by the frame timestamp, and a
+    replay takes its waypoint changes from the recording, so it reproduces
+    the recorded servo commands.
+
+    Returns False if interrupted or if the source runs dry before the last
+    waypoint is done.
+    """
+    platform = PlatformController(cap, pid_x, pid_y, x_servo_pin, y_servo_pin,
+                                  pi if drive_servos else None,
+                                  tolerance=tolerance, settle_frames=settle_frames,
+                                  settle_radius=settle_radius, min_confidence=min_confidence,
+                                  recorder=recorder, clock=clock)
     vel_timestamps = []
     vel_values     = []
     prev_centroid  = None
     prev_time      = None
-
-    for idx, (target_x, target_y) in enumerate(trajectory):
-        print(f"Tracking Waypoint {idx + 1}/{len(trajectory)}: ({target_x}, {target_y})")
-
-        target_x_px, target_y_px = loc.coordinates_to_pixels(target_x, target_y)
-        pid_x.setpoint = target_x_px
-        pid_y.setpoint = target_y_px
-
-        start_time    = time.time()
-        settled_count = 0
-
-        while True:
-            ret, frame = cap.read()
-            if not ret: break
-
-            centroid, _ = loc.find_centroid(frame)
-            droplet_norm = None
-            now = time.time()
-
-            if centroid is not None:
-                x_error, y_error = loc.find_error(target_x_px, target_y_px, centroid)
-                norm_x, norm_y   = loc.pixels_to_coordinates(centroid[0], centroid[1])
-                droplet_norm     = (norm_x, norm_y)
-
-                # Velocity calculation (mm/s)
-                if prev_centroid is not None and prev_time is not None:
-                    dt = now - prev_time
-                    if dt > 0:
-                        delta = np.array(centroid) - np.array(prev_centroid)
-                        dist_mm = pixels_to_mm(delta[0], delta[1])
-                        speed = dist_mm / dt          # mm/s
-                        vel_timestamps.append(now)
-                        vel_values.append(speed)
-
-                prev_centroid = centroid
-                prev_time     = now
-
-                # Overlay on live feed
-                cv2.circle(frame, (int(centroid[0]), int(centroid[1])), 10, (0, 255, 0), 2)
-                cv2.drawMarker(frame, (int(target_x_px), int(target_y_px)),
-                               (0, 255, 255), cv2.MARKER_CROSS, 20, 2)
-
-                if vel_values:
-                    cv2.putText(frame, f"Vel: {vel_values[-1]:.1f} mm/s",
-                                (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.65, (0, 255, 0), 2)
-
-                if abs(x_error) < tolerance and abs(y_error) < tolerance:
-                    settled_count += 1
-                    if settled_count >= 10: break
-                else:
-                    settled_count = 0
-
-                adjust_servo(centroid[0], centroid[1])
-
-            canvas = draw_coordinate_canvas()
-            canvas = draw_trajectory_on_canvas(canvas, trajectory, idx, droplet_norm, (target_x, target_y))
-
-            cv2.imshow('Trajectory Map', canvas)
-            cv2.imshow('Live Camera Feed', frame)
-
-            if time.time() - start_time > max_time_per_point: break
-            if cv2.waitKey(1) & 0xFF == ord('q'):
-                show_velocity_graph(vel_timestamps, vel_values)
-                return False
+    current        = None
+
+    for idx in platform.run(trajectory, max_time_per_point, annotate=True):
+        target_x, target_y = trajectory[idx]
+        if idx != current:
+            print(f"Tracking Waypoint {idx + 1}/{len(trajectory)}: ({target_x}, {target_y})")
+            current = idx
+
+        frame        = platform.frame
+        centroid     = platform.centroid
+        now          = platform.now
+        droplet_norm = None
+
+        if centroid is not None:
+            centroid_px  = platform.detection.centroid
+            droplet_norm = loc.pixels_to_coordinates(*centroid_px, platform.frame_size)
+
+            # Velocity calculation (mm/s)
+            if prev_centroid is not None and prev_time is not None:
+                dt = now - prev_time
+                if dt > 0:
+                    delta = np.array(centroid) - np.array(prev_centroid)
+                    dist_mm = pixels_to_mm(delta[0], delta[1])
+                    speed = dist_mm / dt          # mm/s
+                    vel_timestamps.append(now)
+                    vel_values.append(speed)
+
+            prev_centroid = centroid
+            prev_time     = now
+
+            # Overlay on live feed
+            marker_x, marker_y = loc.coordinates_to_pixels(target_x, target_y, platform.frame_size)
+            cv2.circle(frame, (int(centroid_px[0]), int(centroid_px[1])), 10, (0, 255, 0), 2)
+            cv2.drawMarker(frame, (int(marker_x), int(marker_y)),
+                           (0, 255, 255), cv2.MARKER_CROSS, 20, 2)
+
+            if vel_values:
+                cv2.putText(frame, f"Vel: {vel_values[-1]:.1f} mm/s",
+                            (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.65, (0, 255, 0), 2)
+
+        canvas = draw_coordinate_canvas()
+        canvas = draw_trajectory_on_canvas(canvas, trajectory, idx, droplet_norm, (target_x, target_y))
+
+        cv2.imshow('Trajectory Map', canvas)
+        cv2.imshow('Live Camera Feed', frame)
+
+        if cv2.waitKey(1) & 0xFF == ord('q'):
+            platform.finish()
+            show_velocity_graph(vel_timestamps, vel_values)
+            return False
 
     show_velocity_graph(vel_timestamps, vel_values)
-    return True
+    return platform.completed
 
 # ─────────────────────────────────────────────
 # Main Entry Point with Original Menu
 # ─────────────────────────────────────────────
 
-def main():
-    cap = cv2.VideoCapture(0)
-    set_servo_position(x_servo_pin,-0.1)
-    set_servo_position(y_servo_pin,-0.1)
+def replay(path):
+    """Re-run follow_trajectory on a recording, without camera or servos."""
+    src = ReplaySource(path)
+    trajectory = [tuple(p) for p in src.metadata["trajectory"]]
+    print(f"Replaying {len(src)} frames, {len(trajectory)} waypoints from {path}")
+    success = follow_trajectory(src, trajectory, clock=src.clock, drive_servos=False)
+    print("\nDone!" if success else "\nInterrupted.")
+    src.release()
+    cv2.destroyAllWindows()
 
+def main():
     print("\n=== Droplet Trajectory Control ===")
     print("1. Single point")
     print("2. Line trajectory")
     print("3. Arc trajectory")
+    print("4. Replay recording")
 
-    choice = input("Select mode (1/2/3): ")
+    choice = input("Select mode (1/2/3/4): ")
 
     if choice == "1":
         req_x = int(input("Enter x (-100 to 100): "))
@@ -287,20 +305,37 @@ def main():
         e_ang = float(input("End Angle: "))
         num = int(input("Points (default 50): ") or "50")
         trajectory = generate_arc_trajectory(cx, cy, r, s_ang, e_ang, num)
+
+    elif choice == "4":
+        replay(input("Recording file: ")); return
     else:
         print("Invalid choice."); return
 
-    preview = draw_coordinate_canvas()
-    preview = draw_trajectory_on_canvas(preview, trajectory)
-    cv2.imshow('Trajectory Map', preview)
-    print("\nPress any key in the window to start...")
-    cv2.waitKey(0)
-
-    success = follow_trajectory(cap, trajectory)
-    print("\nDone!" if success else "\nInterrupted.")
-
-    cap.release()
-    cv2.destroyAllWindows()
+    record_path = input("Record run to file (blank to skip): ").strip()
+    recorder = FrameRecorder(record_path, metadata={"trajectory": trajectory}) if record_path else None
+
+    cap = CameraSource(0)
+    try:
+        set_servo_position(x_servo_pin,-0.1)
+        set_servo_position(y_servo_pin,-0.1)
+
+        preview = draw_coordinate_canvas()
+        preview = draw_trajectory_on_canvas(preview, trajectory)
+        cv2.imshow('Trajectory Map', preview)
+        print("\nPress any key in the window to start...")
+        cv2.waitKey(0)
+
+        success = follow_trajectory(cap, trajectory, recorder=recorder)
+        print("\nDone!" if success else "\nInterrupted.")
+    finally:
+        # A failed recording must not leave the camera open
+        try:
+            if recorder is not None:
+                recorder.close()
+                print(f"Recorded {recorder.written} frames to {record_path} ({recorder.dropped} dropped)")
+        finally:
+            cap.release()
+            cv2.destroyAllWindows()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,219 @@
+import argparse
+import csv
+import glob
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+import numpy as np
+
+# Offline step-response analysis for PID telemetry logs such as
+# "PID Response.csv": Time, X Position, Y Position, X Error, Y Error, where
+# error = position - setpoint in pixels. The setpoint is recovered per sample,
+# a log is split into runs wherever it changes, and each run/axis gets the
+# usual step-response metrics.
+
+COLUMNS = ("Time", "X Position", "Y Position", "X Error", "Y Error")
+
+# Settling band in pixels: by default the same 25 px per-axis tolerance
+# follow_trajectory uses to decide a waypoint is reached.
+SETTLE_BAND_PX = 25.0
+# Steady-state error is averaged over the last STEADY_FRACTION of a run
+STEADY_FRACTION = 0.1
+# Runs shorter than this many samples are skipped
+MIN_RUN_SAMPLES = 10
+
+# Some logs were written with a stray quoted-newline column (,"\n") that
+# breaks every row across two lines; strip it before parsing. Only a blank
+# quoted field at the very end of a row is removed.
+_QUOTED_FIELD = re.compile(r',[ \t]*"\s*"[ \t]*(?=\r?$)', re.M)
+
+# ─────────────────────────────────────────────
+# Loading
+# ─────────────────────────────────────────────
+
+def load_log(path):
+    """Parse a telemetry CSV into a dict of float arrays keyed by column name.
+
+    Time is made relative to the first sample. Malformed trailing columns,
+    blank lines and short or non-numeric rows are dropped.
+    """
+    with open(path, newline="") as f:
+        text = _QUOTED_FIELD.sub("", f.read())
+    lines = [line.rstrip(",") for line in text.splitlines() if line.strip()]
+    if not lines:
+        raise ValueError(f"{path}: empty log")
+
+    header = [h.strip() for h in next(csv.reader([lines[0]]))]
+    missing = [c for c in COLUMNS if c not in header]
+    if missing:
+        raise ValueError(f"{path}: missing columns {missing}")
+    usecols = [header.index(c) for c in COLUMNS]
+    width = max(usecols) + 1
+
+    rows = [line for line in lines[1:] if line.count(",") + 1 >= width]
+    try:
+        data = np.loadtxt(rows, delimiter=",", usecols=usecols, ndmin=2)
+    except ValueError:
+        data = np.genfromtxt(rows, delimiter=",", usecols=usecols, invalid_raise=False, ndmin=2)
+        data = data[~np.isnan(data).any(axis=1)]
+    if len(data) == 0:
+        raise ValueError(f"{path}: no valid samples")
+
+    log = {name: data[:, i] for i, name in enumerate(COLUMNS)}
+    log["Time"] = log["Time"] - log["Time"][0]
+    return log
+
+def split_runs(log):
+    """(start, stop) index pairs of the stretches with a constant setpoint."""
+    sp_x = log["X Position"] - log["X Error"]
+    sp_y = log["Y Position"] - log["Y Error"]
+    changes = np.flatnonzero((np.diff(sp_x) != 0) | (np.diff(sp_y) != 0)) + 1
+    bounds = np.concatenate(([0], changes, [len(sp_x)]))
+    return [(int(a), int(b)) for a, b in zip(bounds[:-1], bounds[1:])
+            if b - a >= MIN_RUN_SAMPLES]
+
+# ─────────────────────────────────────────────
+# Metrics
+# ─────────────────────────────────────────────
+
+def _first_crossing(t, progress, level):
+    idx = np.flatnonzero(progress >= level)
+    return t[idx[0]] if len(idx) else np.nan
+
+def dominant_frequency(t, signal):
+    """(Hz, amplitude) of the strongest non-DC component, on a uniform resample."""
+    dt = np.median(np.diff(t))
+    if len(t) < 4 or not dt > 0:
+        return np.nan, np.nan
+    grid = np.arange(t[0], t[-1], dt)
+    resampled = np.interp(grid, t, signal)
+    resampled = resampled - resampled.mean()
+    spectrum = np.abs(np.fft.rfft(resampled * np.hanning(len(resampled))))
+    freqs = np.fft.rfftfreq(len(resampled), dt)
+    if len(spectrum) < 2:
+        return np.nan, np.nan
+    k = int(np.argmax(spectrum[1:])) + 1
+    return float(freqs[k]), float(2 * spectrum[k] / np.hanning(len(resampled)).sum())
+
+def step_metrics(t, position, error, band=SETTLE_BAND_PX):
+    """Step-response metrics for one axis of one run.
+
+    Times are in seconds from the start of the run, overshoot is a percentage
+    of the step, errors are in pixels. Settling means |error| stays within
+    `band`. Metrics that don't apply (e.g. rise time for a run that starts
+    inside the band) are NaN.
+    """
+    t = t - t[0]
+    setpoint = position[0] - error[0]
+    step = setpoint - position[0]
+
+    if abs(step) > band:
+        # progress: 0 at the start, 1 on target, >1 past it
+        progress = (position - position[0]) / step
+        rise_time = _first_crossing(t, progress, 0.9) - _first_crossing(t, progress, 0.1)
+        overshoot = max(0.0, (progress.max() - 1) * 100)
+    else:
+        rise_time = overshoot = np.nan
+
+    outside = np.flatnonzero(np.abs(error) > band)
+    if len(outside) == 0:
+        settling_time = 0.0
+    elif outside[-1] + 1 < len(t):
+        settling_time = t[outside[-1] + 1]
+    else:
+        settling_time = np.nan
+
+    tail = max(1, int(len(error) * STEADY_FRACTION))
+    dt = np.diff(t)
+    abs_err = np.abs(error)
+    freq, amp = dominant_frequency(t, error)
+
+    return {
+        "step_px":          float(step),
+        "rise_time_s":      float(rise_time),
+        "overshoot_pct":    float(overshoot),
+        "settling_time_s":  float(settling_time),
+        "steady_state_err": float(error[-tail:].mean()),
+        "iae":              float(np.sum((abs_err[1:] + abs_err[:-1]) / 2 * dt)),
+        "ise":              float(np.sum((error[1:] ** 2 + error[:-1] ** 2) / 2 * dt)),
+        "dominant_hz":      freq,
+        "dominant_amp_px":  amp,
+    }
+
+def analyze_log(path, band=SETTLE_BAND_PX):
+    """One summary row per run and axis in the log."""
+    log = load_log(path)
+    rows = []
+    for run, (a, b) in enumerate(split_runs(log)):
+        t = log["Time"][a:b]
+        for axis in ("X", "Y"):
+            metrics = step_metrics(t, log[f"{axis} Position"][a:b], log[f"{axis} Error"][a:b], band)
+            rows.append({"file": os.path.basename(path), "run": run, "axis": axis,
+                         "samples": b - a, "duration_s": float(t[-1] - t[0]), **metrics})
+    return rows
+
+# ─────────────────────────────────────────────
+# Batch summary
+# ─────────────────────────────────────────────
+
+def _analyze_or_error(path, band):
+    try:
+        return analyze_log(path, band), None
+    except (OSError, ValueError) as exc:
+        return [], f"{type(exc).__name__}: {exc}"
+
+def summarize(paths, workers=None, band=SETTLE_BAND_PX):
+    """Analyze many logs in parallel worker processes; returns all rows in path order.
+
+    A log that can't be read or parsed is reported on stderr and skipped.
+    """
+    paths = list(paths)
+    analyze = partial(_analyze_or_error, band=band)
+    if len(paths) <= 1 or workers == 1:
+        results = map(analyze, paths)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(analyze, paths, chunksize=8))
+
+    summary = []
+    for path, (rows, error) in zip(paths, results):
+        if error is not None:
+            print(f"Skipping {path}: {error}", file=sys.stderr)
+        summary.extend(rows)
+    return summary
+
+def write_summary(rows, path):
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+
+def print_summary(rows):
+    cols = ("run", "axis", "step_px", "rise_time_s", "overshoot_pct",
+            "settling_time_s", "steady_state_err", "iae", "ise", "dominant_hz")
+    if not rows:
+        print("no runs found")
+        return
+    name_w = max([len("file")] + [len(row["file"]) for row in rows])
+    print(f"{'file':<{name_w}}" + "".join(f"{c:>17}" for c in cols))
+    for row in rows:
+        print(f"{row['file']:<{name_w}}" +
+              "".join(f"{row[c]:>17.3f}" if isinstance(row[c], float) else f"{row[c]:>17}"
+                      for c in cols))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Step-response summary of PID telemetry logs.")
+    parser.add_argument("logs", nargs="*", help='CSV logs (default: "PID Response*.csv")')
+    parser.add_argument("-o", "--output", help="also write the summary to this CSV")
+    parser.add_argument("-b", "--band", type=float, default=SETTLE_BAND_PX,
+                        help=f"settling band in pixels (default {SETTLE_BAND_PX:g})")
+    args = parser.parse_args()
+    paths = args.logs or sorted(glob.glob("PID Response*.csv"))
+
+    rows = summarize(paths, band=args.band)
+    print_summary(rows)
+    if args.output and rows:
+        write_summary(rows, args.output)
+        print(f"\nSummary saved as '{args.output}'")
@@ -0,0 +1,219 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+import localization as loc
+
+# One tilt platform = one camera source, one localizer, one PID pair and one
+# pair of servo pins. Nothing here touches module-level state in main.py, so
+# several controllers can run side by side in the same process.
+
+REFERENCE_SIZE = loc.REFERENCE_SIZE
+
+# Frames without a detection before a source in "settle" mode is put back
+# into "track" mode to reacquire the droplet at full resolution.
+LOST_FRAMES = 3
+
+def servo_pulse_width(position, min_pulse=500, max_pulse=2500):
+    """Map a -1..1 servo position onto a pigpio pulse width in microseconds."""
+    position = max(-1.0, min(1.0, position))
+    return min_pulse + (position + 1) * (max_pulse - min_pulse) / 2
+
+# ─────────────────────────────────────────────
+# Single platform
+# ─────────────────────────────────────────────
+
+class PlatformController:
+    """Closed-loop droplet control for one platform.
+
+    `source` is anything with read() (cv2.VideoCapture, camera.CameraSource,
+    recording.ReplaySource, camera.FakeCapture). With pi=None the PIDs still
+    run but no servo is driven. Errors and tolerances are in 720x480
+    reference pixels; see main.follow_trajectory for what the other
+    arguments do.
+    """
+
+    def __init__(self, source, pid_x, pid_y, x_pin, y_pin, pi=None, name="platform",
+                 tolerance=25, settle_frames=5, settle_radius=60,
+                 min_confidence=loc.MIN_CONFIDENCE, weighted=False,
+                 recorder=None, clock=None):
+        self.source   = source
+        self.pid_x    = pid_x
+        self.pid_y    = pid_y
+        self.x_pin    = x_pin
+        self.y_pin    = y_pin
+        self.pi       = pi
+        self.name     = name
+        self.tolerance      = tolerance
+        self.settle_frames  = settle_frames
+        self.settle_radius  = settle_radius
+        self.min_confidence = min_confidence
+        self.weighted       = weighted
+        self.recorder       = recorder
+        self.can_switch     = hasattr(source, "set_mode")
+
+        # The PIDs run on the timestamp recorded with each frame rather than
+        # their own clock, so replaying a recording with clock=source.clock
+        # reproduces the recorded servo commands exactly.
+        self.clock = time.time if clock is None else clock
+        pid_x.time_fn = pid_y.time_fn = self._frame_time
+
+        self.target    = None
+        self.target_px = None
+        self.waypoint  = -1
+        self.completed = False
+        self.settled_count = 0
+        self.missed    = 0
+        self.frames    = 0
+        self.frame     = None
+        self.now       = None
+        self.detection = None
+        self.centroid  = None
+        self.error     = None
+        self.servo_cmd = None
+
+    def _frame_time(self):
+        return self.now
+
+    @property
+    def settled(self):
+        return self.settled_count >= self.settle_frames
+
+    @property
+    def frame_size(self):
+        h, w = self.frame.shape[:2]
+        return (w, h)
+
+    def set_target(self, x, y):
+        """Aim at normalized (x, y) and restart the settle count."""
+        self.target    = (x, y)
+        self.target_px = loc.coordinates_to_pixels(x, y, REFERENCE_SIZE)
+        self.pid_x.setpoint, self.pid_y.setpoint = self.target_px
+        self.settled_count = 0
+
+    def drive(self, x, y):
+        """Step both PIDs on a reference-pixel position and return the servo commands."""
+        cmd_x, cmd_y = -1 * self.pid_x(x), -1 * self.pid_y(y)
+        if self.pi is not None:
+            self.pi.set_servo_pulsewidth(self.x_pin, servo_pulse_width(cmd_x))
+            self.pi.set_servo_pulsewidth(self.y_pin, servo_pulse_width(cmd_y))
+        return cmd_x, cmd_y
+
+    def step(self, annotate=False):
+        """Process one frame. Returns False once the source runs dry."""
+        ret, frame = self.source.read()
+        if not ret:
+            return False
+        self.frame  = frame
+        self.now    = self.clock()
+        if self.frames == 0:
+            self.pid_x.reset()
+            self.pid_y.reset()
+        raw_frame   = frame.copy() if self.recorder is not None else None
+        self.centroid = self.error = self.servo_cmd = None
+
+        self.detection, _ = loc.locate_droplet(frame, self.weighted, annotate)
+        if self.detection is not None and self.detection.confidence >= self.min_confidence:
+            self.centroid = loc.to_reference_pixels(*self.detection.centroid, self.frame_size)
+            x_error, y_error = loc.find_error(*self.target_px, self.centroid)
+            self.error = (x_error, y_error)
+
+            if abs(x_error) < self.tolerance and abs(y_error) < self.tolerance:
+                self.settled_count += 1
+            else:
+                self.settled_count = 0
+
+            if self.can_switch:
+                dist = (x_error ** 2 + y_error ** 2) ** 0.5
+                if dist < self.settle_radius:
+                    self.source.set_mode("settle")
+                elif dist > 2 * self.settle_radius:
+                    self.source.set_mode("track")
+
+            self.servo_cmd = self.drive(*self.centroid)
+            self.missed = 0
+        else:
+            # Settling needs consecutive frames, so a dropout starts it over
+            self.settled_count = 0
+            self.missed += 1
+            if self.can_switch and self.missed >= LOST_FRAMES:
+                self.source.set_mode("track")
+
+        if self.recorder is not None:
+            self.recorder.record(raw_frame, self.now, self.servo_cmd, self.waypoint)
+        self.frames += 1
+        return True
+
+    def finish(self):
+        if self.can_switch:
+            self.source.set_mode("track")
+
+    def run(self, trajectory, max_time_per_point=30, annotate=False):
+        """Step through `trajectory`, yielding the waypoint index after every frame.
+
+        A waypoint is done once the droplet has settled on it or
+        `max_time_per_point` seconds of frame time have passed. When the
+        source is a recording (it has next_waypoint()), waypoint changes are
+        taken from the recording instead, so a replay switches targets on the
+        same frames the live run did, wherever in the file it starts.
+        `completed` tells whether the last waypoint was reached.
+        """
+        replaying = hasattr(self.source, "next_waypoint")
+        idx = self.source.next_waypoint() if replaying else 0
+        self.completed = False
+        while idx is not None and 0 <= idx < len(trajectory):
+            self.waypoint = idx
+            self.set_target(*trajectory[idx])
+            start_time = None
+            while True:
+                if not self.step(annotate):
+                    self.finish()
+                    return
+                if start_time is None:
+                    start_time = self.now
+                yield idx
+                if replaying:
+                    next_idx = self.source.next_waypoint()
+                    if next_idx != idx:
+                        break
+                elif self.settled or self.now - start_time > max_time_per_point:
+                    next_idx = idx + 1
+                    break
+            if next_idx is None:
+                # End of the recording
+                self.completed = idx == len(trajectory) - 1
+                break
+            idx = next_idx
+        else:
+            self.completed = idx is not None and idx >= len(trajectory)
+        self.finish()
+
+    def follow(self, trajectory, max_time_per_point=30):
+        """Headless trajectory follow: settle on each waypoint or time out.
+
+        Returns False if the source runs dry before the last waypoint is done.
+        """
+        for _ in self.run(trajectory, max_time_per_point):
+            pass
+        return self.completed
+
+# ─────────────────────────────────────────────
+# Several platforms
+# ─────────────────────────────────────────────
+
+def run_platforms(controllers, trajectories, max_workers=None, max_time_per_point=30):
+    """Follow one trajectory per controller concurrently; returns their results.
+
+    `controllers` and `trajectories` must be the same length.
+
+    Each controller gets its own worker thread. The per-frame work is almost
+    entirely OpenCV calls, which release the GIL, so the threads overlap on
+    multiple cores without pickling cameras or pigpio handles into other
+    processes.
+    """
+    if len(controllers) != len(trajectories):
+        raise ValueError(f"{len(controllers)} controllers but {len(trajectories)} trajectories")
+    if not controllers:
+        return []
+    with ThreadPoolExecutor(max_workers=max_workers or len(controllers)) as pool:
+        futures = [pool.submit(c.follow, t, max_time_per_point)
+                   for c, t in zip(controllers, trajectories)]
+        return [f.result() for f in futures]
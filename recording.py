@@ -0,0 +1,276 @@
+import bisect
+import json
+import math
+import os
+import queue
+import struct
+import threading
+import cv2
+import numpy as np
+
+# ── File layout ───────────────────────────────────────────────────────────────
+#   MAGIC, codec tag, metadata (u32 length + JSON)
+#   record*     RECORD header + payload (encoded image, or raw pixels)
+#               The header carries a sequence number that counts every frame
+#               offered to the recorder, so dropped frames show up as gaps,
+#               and the index of the waypoint being tracked (-1 for none).
+#   index       INDEX_ENTRY per frame: (file offset, timestamp)
+#   trailer     TRAILER: (index offset, frame count, INDEX_MAGIC)
+# Records are written a chunk at a time. If the trailer is missing (crash,
+# power loss) the reader rebuilds the index by scanning the records.
+
+MAGIC       = b"KOTAREC\x02"
+INDEX_MAGIC = b"KOTAIDX\x01"
+RECORD      = struct.Struct("<IidddHHBI") # seq, waypoint, t, servo_x, servo_y, h, w, channels, size
+INDEX_ENTRY = struct.Struct("<Qd")        # offset, t
+TRAILER     = struct.Struct("<QQ8s")      # index offset, count, INDEX_MAGIC
+META_LEN    = struct.Struct("<I")
+
+CODECS = (".jpg", ".png", "raw")
+
+def _encode(frame, codec, params):
+    if codec == "raw":
+        return np.ascontiguousarray(frame).tobytes()
+    ok, buf = cv2.imencode(codec, frame, params)
+    if not ok:
+        raise ValueError(f"Could not encode frame as {codec}")
+    return buf.tobytes()
+
+def _decode(payload, h, w, c, codec):
+    if codec == "raw":
+        return np.frombuffer(payload, dtype=np.uint8).reshape(h, w, c).copy()
+    return cv2.imdecode(np.frombuffer(payload, dtype=np.uint8), cv2.IMREAD_UNCHANGED)
+
+# ─────────────────────────────────────────────
+# Recorder
+# ─────────────────────────────────────────────
+
+class FrameRecorder:
+    """Writes frames, timestamps and servo commands to disk on a background thread.
+
+    record() never blocks: frames wait in a queue of at most `max_pending`
+    entries and are dropped (counted in `dropped`) when it is full, so a slow
+    disk can't stall the control loop. Encoding happens on the writer thread.
+    The default PNG codec is lossless, so a replay sees exactly the pixels
+    the live loop saw; ".jpg" is smaller but shifts the detections.
+    `metadata` (e.g. the trajectory) must be JSON-serializable.
+
+    If writing fails (encode error, full disk) the writer stops, further
+    frames are dropped and close() re-raises the error.
+    """
+
+    def __init__(self, path, codec=".png", quality=90, chunk_frames=32, max_pending=64,
+                 metadata=None):
+        if codec not in CODECS:
+            raise ValueError(f"codec must be one of {CODECS}")
+        self.path         = path
+        self.codec        = codec
+        self.chunk_frames = chunk_frames
+        self.params       = [cv2.IMWRITE_JPEG_QUALITY, quality] if codec == ".jpg" else []
+        self.dropped      = 0
+        self.written      = 0
+        self.error        = None
+        self._seq         = 0
+        self._chunk       = []
+
+        self._queue  = queue.Queue(maxsize=max_pending)
+        self._index  = []
+        self._file   = open(path, "wb")
+        self._file.write(MAGIC)
+        self._file.write(codec.encode().ljust(4, b"\0"))
+        meta = json.dumps(metadata or {}).encode()
+        self._file.write(META_LEN.pack(len(meta)) + meta)
+        self._thread = threading.Thread(target=self._run, name="FrameRecorder", daemon=True)
+        self._thread.start()
+
+    def record(self, frame, timestamp, servo=None, waypoint=-1):
+        """Queue a frame for writing. The recorder takes ownership of `frame`."""
+        seq = self._seq
+        self._seq += 1
+        if self.error is not None:
+            self.dropped += 1
+            return
+        sx, sy = servo if servo is not None else (math.nan, math.nan)
+        try:
+            self._queue.put_nowait((frame, seq, waypoint, timestamp, sx, sy))
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self):
+        try:
+            self._write_loop()
+        except Exception as exc:
+            # Frames encoded before the failure are still good; write them out
+            if self._chunk:
+                try:
+                    self._file.write(b"".join(self._chunk))
+                    self.written += len(self._chunk) // 2
+                except Exception:
+                    pass
+                self._chunk = []
+            self.error = exc
+            # Unblock anyone still queueing; those frames are lost
+            while True:
+                try:
+                    self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                self.dropped += 1
+
+    def _write_loop(self):
+        chunk  = self._chunk
+        offset = self._file.tell()
+        while True:
+            item = self._queue.get()
+            if item is not None:
+                frame, seq, waypoint, t, sx, sy = item
+                h, w = frame.shape[:2]
+                c = frame.shape[2] if frame.ndim == 3 else 1
+                payload = _encode(frame, self.codec, self.params)
+                header  = RECORD.pack(seq, waypoint, t, sx, sy, h, w, c, len(payload))
+                self._index.append((offset, t))
+                chunk.append(header)
+                chunk.append(payload)
+                offset += len(header) + len(payload)
+            if chunk and (item is None or len(chunk) >= 2 * self.chunk_frames):
+                data, count = b"".join(chunk), len(chunk) // 2
+                chunk.clear()   # a failed write isn't retried on error
+                self._file.write(data)
+                self.written += count
+            if item is None:
+                return
+
+    def close(self):
+        """Flush pending frames, then write the index and trailer."""
+        if self._file.closed:
+            return
+        while self._thread.is_alive():
+            try:
+                self._queue.put(None, timeout=0.1)
+                break
+            except queue.Full:
+                pass
+        self._thread.join()
+        if self.error is not None:
+            # No index: ReplaySource rebuilds it from whatever made it to disk
+            self._file.close()
+            raise self.error
+        index_offset = self._file.tell()
+        self._file.write(b"".join(INDEX_ENTRY.pack(o, t) for o, t in self._index))
+        self._file.write(TRAILER.pack(index_offset, len(self._index), INDEX_MAGIC))
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+# ─────────────────────────────────────────────
+# Replay
+# ─────────────────────────────────────────────
+
+class ReplaySource:
+    """Plays a recording back through the cv2.VideoCapture read() interface.
+
+    Pass `clock` to follow_trajectory so timing comes from the recorded
+    timestamps rather than the wall clock. The waypoint and servo command
+    recorded with the last frame read are in `waypoint` and `servo`;
+    PlatformController takes waypoint changes from the recording, so a
+    replay, including one started mid-file, retraces the live run. Gaps in
+    the sequence numbers (frames the recorder dropped) are reported, since
+    the replayed commands can't match across them.
+    """
+
+    def __init__(self, path, start=0):
+        self.path  = path
+        self._file = open(path, "rb")
+        if self._file.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a frame recording")
+        tag = self._file.read(4).rstrip(b"\0").decode()
+        if tag not in CODECS:
+            raise ValueError(f"{path}: unknown codec {tag!r}")
+        self.codec = tag
+        n, = META_LEN.unpack(self._file.read(META_LEN.size))
+        self.metadata = json.loads(self._file.read(n))
+        self._data_start = self._file.tell()
+        self.offsets, self.timestamps = self._load_index()
+        self.position  = 0
+        self.timestamp = None
+        self.servo     = None
+        self.seq       = None
+        self.waypoint  = None
+        self.seek(start)
+
+    def _load_index(self):
+        size = os.fstat(self._file.fileno()).st_size
+        if size >= self._data_start + TRAILER.size:
+            self._file.seek(size - TRAILER.size)
+            index_offset, count, magic = TRAILER.unpack(self._file.read(TRAILER.size))
+            if magic == INDEX_MAGIC:
+                self._file.seek(index_offset)
+                raw = self._file.read(count * INDEX_ENTRY.size)
+                entries = list(INDEX_ENTRY.iter_unpack(raw))
+                return [o for o, _ in entries], [t for _, t in entries]
+
+        # No trailer: walk the records until the data runs out
+        offsets, timestamps = [], []
+        offset = self._data_start
+        while offset + RECORD.size <= size:
+            self._file.seek(offset)
+            _, _, t, _, _, _, _, _, n = RECORD.unpack(self._file.read(RECORD.size))
+            if offset + RECORD.size + n > size:
+                break
+            offsets.append(offset)
+            timestamps.append(t)
+            offset += RECORD.size + n
+        return offsets, timestamps
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def seek(self, index):
+        """Position the next read() at frame `index` (negative counts from the end)."""
+        if index < 0:
+            index += len(self.offsets)
+        self.position = max(0, min(index, len(self.offsets)))
+        self.seq = None
+        if self.position < len(self.timestamps):
+            self.timestamp = self.timestamps[self.position]
+
+    def seek_time(self, t):
+        """Position the next read() at the first frame recorded at or after `t`."""
+        self.seek(bisect.bisect_left(self.timestamps, t))
+
+    def next_waypoint(self):
+        """Waypoint recorded with the frame the next read() returns, or None at the end."""
+        if self.position >= len(self.offsets):
+            return None
+        self._file.seek(self.offsets[self.position])
+        return RECORD.unpack(self._file.read(RECORD.size))[1]
+
+    def read(self):
+        if self.position >= len(self.offsets):
+            return False, None
+        self._file.seek(self.offsets[self.position])
+        seq, waypoint, t, sx, sy, h, w, c, n = RECORD.unpack(self._file.read(RECORD.size))
+        frame = _decode(self._file.read(n), h, w, c, self.codec)
+        if self.seq is not None and seq != self.seq + 1:
+            print(f"Warning: {seq - self.seq - 1} frame(s) missing from {self.path} "
+                  f"before frame {seq}; replay may diverge from the recording")
+        self.position += 1
+        self.seq       = seq
+        self.waypoint  = waypoint
+        self.timestamp = t
+        self.servo     = None if math.isnan(sx) else (sx, sy)
+        return True, frame
+
+    def clock(self):
+        """Timestamp of the most recently read frame."""
+        return self.timestamp
+
+    def isOpened(self):
+        return not self._file.closed
+
+    def release(self):
+        self._file.close()
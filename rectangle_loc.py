@@ -1,19 +1,15 @@
 import cv2
+import localization as loc
+from camera import CameraSource
 
-# 1. Define your rectangle coordinates
-# (x, y) coordinates for the top-left and bottom-right corners
-top_left = (160, 75)      # Edit these to move the box
-bottom_right = (540, 400)  # Edit these to resize the box
+# 1. The rectangle is the localizer's search zone (edit loc.SEARCH_* to move
+#    or resize it), converted to pixels for whatever size the camera delivers
 
 # Color in BGR (Blue, Green, Red) -> (0, 255, 0) is Green
 color = (0, 255, 0)
 thickness = 3
 
-cap = cv2.VideoCapture(0)
-
-# Standard Pi Resolution
-cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
+cap = CameraSource(0)
 
 print("Displaying rectangle overlay... Press 'q' to quit.")
 
@@ -23,6 +19,10 @@ while True:
         break
 
     # 2. Draw the rectangle on the current frame
+    size = (frame.shape[1], frame.shape[0])
+    x1, y1 = loc.coordinates_to_pixels(loc.SEARCH_X_MIN, loc.SEARCH_Y_MAX, size)
+    x2, y2 = loc.coordinates_to_pixels(loc.SEARCH_X_MAX, loc.SEARCH_Y_MIN, size)
+    top_left, bottom_right = (int(x1), int(y1)), (int(x2), int(y2))
     cv2.rectangle(frame, top_left, bottom_right, color, thickness)
 
     # 3. Optional: Add a label or corner coordinates text